@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Benchmark do montador de respostas HTTP (nfse_common.http)
+# Compara bytes e CPU por resposta entre json stdlib x orjson e identity x gzip x br.
+#
+# Uso: python benchmarks/bench_response.py [--items 500] [--repeat 200]
+import argparse, base64, decimal, json, os, sys, time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "lambdas", "common", "python")
+)
+
+from nfse_common import http  # noqa: E402
+
+
+def build_payload(items):
+    # Lista de invoices no formato devolvido pelo DynamoDB (totais em Decimal)
+    return {
+        "items": [
+            {
+                "invoiceId": f"{i:012x}",
+                "companyCnpj": "12345678000195",
+                "status": "PROCESSED",
+                "createdAt": "2025-01-01T12:00:00.000000Z",
+                "processedAt": "2025-01-01T12:00:05.000000Z",
+                "total": decimal.Decimal(f"{1000 + i}.{i % 100:02d}"),
+                "xmlKey": f"xml/{i:012x}.xml",
+            }
+            for i in range(items)
+        ]
+    }
+
+
+def cpu_per_call(fn, repeat, rounds=5):
+    # Mede o tempo de CPU médio (microssegundos) de uma chamada; usa a melhor de
+    # várias rodadas para reduzir o ruído de GC e de outros processos
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.process_time()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.process_time() - start)
+    return best / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de respostas HTTP")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = build_payload(args.items)
+    fast_backend = "orjson" if http.orjson is not None else "indisponivel"
+    print(f"items={args.items} repeat={args.repeat} backend rapido={fast_backend}")
+    print(f"{'cenario':<28}{'bytes':>10}{'us/resp':>12}")
+
+    def stdlib_baseline():
+        # Linha de base: como os handlers serializavam antes (json.dumps puro)
+        return json.dumps(payload, default=str)
+
+    body = stdlib_baseline()
+    us = cpu_per_call(stdlib_baseline, args.repeat)
+    print(f"{'json.dumps (antes)':<28}{len(body):>10}{us:>12.1f}")
+
+    saved_orjson = http.orjson
+    backends = [("stdlib", None)]
+    if saved_orjson is not None:
+        backends.append(("orjson", saved_orjson))
+    encodings = [("identity", ""), ("gzip", "gzip")]
+    if http.brotli is not None:
+        encodings.append(("br", "br"))
+
+    try:
+        for backend_name, backend in backends:
+            http.orjson = backend
+            for encoding_name, accept in encodings:
+                event = {"headers": {"Accept-Encoding": accept}}
+                response = http.json_response(200, payload, event)
+                # Bytes trafegados: o API Gateway decodifica o base64 antes de enviar
+                wire = response["body"]
+                if response.get("isBase64Encoded"):
+                    wire = base64.b64decode(wire)
+                us = cpu_per_call(
+                    lambda: http.json_response(200, payload, event), args.repeat
+                )
+                label = f"{backend_name}+{encoding_name}"
+                print(f"{label:<28}{len(wire):>10}{us:>12.1f}")
+    finally:
+        http.orjson = saved_orjson
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# Benchmark da validação de emissão (nfse_common.validation)
+# Mede validações por segundo por núcleo para payloads válidos e inválidos.
+#
+# Uso: python benchmarks/bench_validation.py [--runs 50000]
+import argparse, json, os, sys, time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "lambdas", "common", "python")
+)
+
+from nfse_common.validation import parse_invoice_request  # noqa: E402
+
+MINIMAL = {
+    "companyCnpj": "11.222.333/0001-81",
+    "total": 100,
+    "municipalityCode": "3550308",
+    "serviceCode": "01.07",
+    "description": "Suporte técnico",
+}
+FULL = {
+    "companyCnpj": "11.222.333/0001-81",
+    "companyMunicipalRegistration": "1234567",
+    "municipalityCode": "3550308",
+    "total": "1530.75",
+    "deductions": "0",
+    "issRate": "5",
+    "issWithheld": False,
+    "serviceCode": "01.07",
+    "cnaeCode": "6201501",
+    "description": "Suporte técnico e manutenção de sistemas",
+    "simplesNacional": True,
+    "customer": {
+        "document": "123.456.789-09",
+        "name": "Cliente Exemplo",
+        "email": "financeiro@cliente.com.br",
+        "phone": "(11) 3333-4444",
+        "address": {
+            "street": "Av. Paulista",
+            "number": "1000",
+            "district": "Bela Vista",
+            "municipalityCode": "3550308",
+            "state": "SP",
+            "zipCode": "01310-100",
+        },
+    },
+}
+INVALID = {"companyCnpj": "00000000000000", "total": "abc", "customer": {"email": 1}}
+
+
+def run(payload, runs):
+    # Valida o mesmo corpo `runs` vezes (inclui o parse do JSON, como no handler)
+    event = {"body": json.dumps(payload)}
+    start = time.process_time()
+    for _ in range(runs):
+        parse_invoice_request(event)
+    return runs / (time.process_time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da validação")
+    parser.add_argument("--runs", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"runs={args.runs}")
+    print(f"{'payload':<10}{'validacoes/s/core':>20}")
+    cases = [("minimo", MINIMAL), ("completo", FULL), ("invalido", INVALID)]
+    for label, payload in cases:
+        print(f"{label:<10}{run(payload, args.runs):>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Benchmark do gerador de XML da NFS-e (nfse_common.nfse_xml)
+# Mede documentos por segundo por núcleo (tempo de CPU de um único processo).
+#
+# Uso: python benchmarks/bench_xml.py [--docs 20000]
+import argparse, os, sys, time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "lambdas", "common", "python")
+)
+
+from nfse_common.nfse_xml import render_nfse  # noqa: E402
+
+# Payload completo (prestador, serviço e tomador) para aproximar um documento real
+PAYLOAD = {
+    "companyCnpj": "12.345.678/0001-95",
+    "companyMunicipalRegistration": "1234567",
+    "municipalityCode": "3550308",
+    "total": "1530.75",
+    "deductions": "0",
+    "issRate": "5",
+    "issWithheld": False,
+    "serviceCode": "01.07",
+    "cnaeCode": "6201501",
+    "description": "Suporte técnico & manutenção de sistemas <contrato 42/2025>",
+    "simplesNacional": True,
+    "customer": {
+        "document": "98.765.432/0001-10",
+        "name": "Cliente Exemplo Ltda",
+        "email": "financeiro@cliente.com.br",
+        "phone": "(11) 3333-4444",
+        "address": {
+            "street": "Av. Paulista",
+            "number": "1000",
+            "complement": "Conj. 101",
+            "district": "Bela Vista",
+            "municipalityCode": "3550308",
+            "state": "SP",
+            "zipCode": "01310-100",
+        },
+    },
+}
+
+
+def run(docs, compress):
+    # Gera `docs` documentos e devolve (docs/s por núcleo, bytes do último documento)
+    created_at = "2025-01-01T12:00:00.000000Z"
+    start = time.process_time()
+    for i in range(docs):
+        body, _ = render_nfse(f"{i:012x}", PAYLOAD, created_at, compress=compress)
+    elapsed = time.process_time() - start
+    return docs / elapsed, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do XML da NFS-e")
+    parser.add_argument("--docs", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"docs={args.docs}")
+    print(f"{'cenario':<12}{'bytes/doc':>12}{'docs/s/core':>14}")
+    for label, compress in [("xml", False), ("xml+gzip", True)]:
+        rate, size = run(args.docs, compress)
+        print(f"{label:<12}{size:>12}{rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,17 @@
-# Importa módulos necessários para manipulação de JSON, variáveis de ambiente, datas e AWS
-import json, os, datetime, boto3
+# Importa módulos necessários para manipulação de variáveis de ambiente, datas e AWS
+import os, datetime, boto3
 
 # Importa exceção específica do boto3 para tratamento de erros do DynamoDB
 from botocore.exceptions import ClientError
 
+# Utilitários compartilhados (Layer) para montar as respostas HTTP
+from nfse_common.http import json_response
+
 # Inicializa o cliente DynamoDB
 ddb = boto3.client("dynamodb")
 # Obtém o nome da tabela de invoices a partir da variável de ambiente
 TABLE_INVOICES = os.environ["TABLE_INVOICES"]
 
-# Define os cabeçalhos CORS para permitir requisições de outros domínios
-CORS = {
-    "Content-Type": "application/json",
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization,x-api-key",
-    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
-}
-
 
 def lambda_handler(event, context):
     # Função principal Lambda, chamada a cada requisição
@@ -29,7 +24,7 @@ def lambda_handler(event, context):
         # Valida se o parâmetro 'id' foi informado
         if not invoice_id:
             # Retorna erro 400 se não houver id
-            return {"statusCode": 400, "body": "Missing id"}
+            return json_response(400, {"message": "Missing id"}, event)
 
         # Gera timestamp atual em formato ISO para registrar o cancelamento
         now = datetime.datetime.utcnow().isoformat() + "Z"
@@ -50,17 +45,15 @@ def lambda_handler(event, context):
         except ClientError as e:
             # Se não existir a invoice, retorna 404
             if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-                return {"statusCode": 404, "body": "Not found"}
+                return json_response(404, {"message": "Not found"}, event)
             # Outros erros são propagados
             raise
 
         # Retorna sucesso e dados do invoice cancelado
-        return {
-            "statusCode": 200,
-            "headers": CORS,
-            "body": json.dumps({"invoiceId": invoice_id, "status": "CANCELLED"}),
-        }
+        return json_response(
+            200, {"invoiceId": invoice_id, "status": "CANCELLED"}, event
+        )
     # Captura qualquer erro inesperado, loga e retorna erro 500
     except Exception as e:
         print("ERROR:", e)
-        return {"statusCode": 500, "body": json.dumps({"message": "Internal error"})}
+        return json_response(500, {"message": "Internal error"}, event)
@@ -0,0 +1 @@
+# Pacote compartilhado entre as Lambdas da API (publicado como Lambda Layer)
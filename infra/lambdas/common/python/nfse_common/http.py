@@ -0,0 +1,149 @@
+# Utilitários para montar respostas HTTP das Lambdas integradas ao API Gateway (proxy)
+import base64, decimal, gzip, json, os
+
+# Backend JSON rápido (opcional): usa orjson quando estiver instalado no Layer
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Compressão brotli (opcional): só é oferecida se o módulo estiver disponível
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Cabeçalhos CORS compartilhados por todos os handlers
+CORS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type,Authorization,x-api-key",
+    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+}
+
+# Tamanho mínimo (bytes) do corpo para valer a pena comprimir
+COMPRESS_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+# Níveis de compressão: equilíbrio entre CPU da Lambda e bytes trafegados
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _default(obj):
+    # Decimal (ex: vindo do DynamoDB) vira string com o valor exato; float
+    # perderia precisão e os dois backends produzem a mesma saída
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Encoder stdlib reaproveitado entre chamadas (json.dumps com kwargs cria um por vez)
+_ENCODER = json.JSONEncoder(
+    default=_default, ensure_ascii=False, separators=(",", ":")
+)
+
+
+def _serialize(payload):
+    # Serializa no formato nativo do backend: bytes (orjson) ou str (stdlib),
+    # evitando conversões desnecessárias no caminho sem compressão.
+    # OPT_NON_STR_KEYS mantém o comportamento do stdlib para chaves não-string
+    if orjson is not None:
+        return orjson.dumps(
+            payload, default=_default, option=orjson.OPT_NON_STR_KEYS
+        )
+    return _ENCODER.encode(payload)
+
+
+def dumps(payload):
+    # Serializa o payload em bytes UTF-8 usando o backend mais rápido disponível
+    raw = _serialize(payload)
+    return raw if isinstance(raw, bytes) else raw.encode("utf-8")
+
+
+def parse_json_body(event):
+    # Lê o corpo JSON da requisição, decodificando base64 quando o API Gateway
+    # entregar o payload como binário (binaryMediaTypes)
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return json.loads(body)
+
+
+def _get_header(event, name):
+    # Busca um cabeçalho da requisição sem diferenciar maiúsculas/minúsculas
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value or ""
+    return ""
+
+
+def _accepted_encodings(event):
+    # Interpreta o Accept-Encoding (com valores q) e devolve as codificações aceitas
+    accepted = {}
+    for part in _get_header(event, "Accept-Encoding").split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        # O parâmetro q pode vir em qualquer posição (ex: "gzip; level=1; q=0")
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def choose_encoding(event):
+    # Escolhe a melhor codificação suportada pelo cliente (br > gzip) ou None
+    if not event:
+        return None
+    accepted = _accepted_encodings(event)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    for encoding in candidates:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(raw, encoding):
+    # Comprime o corpo com a codificação escolhida
+    if encoding == "br":
+        return brotli.compress(raw, quality=BROTLI_QUALITY)
+    return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def json_response(status_code, payload, event=None, headers=None):
+    # Monta a resposta no formato do API Gateway; comprime o corpo se o cliente
+    # aceitar e o tamanho passar do limite, devolvendo-o em base64
+    raw = _serialize(payload)
+    response_headers = dict(CORS)
+    if headers:
+        response_headers.update(headers)
+
+    encoding = None
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        # Caches intermediários precisam distinguir as variantes comprimidas
+        response_headers["Vary"] = "Accept-Encoding"
+        encoding = choose_encoding(event)
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        return {
+            "statusCode": status_code,
+            "headers": response_headers,
+            "body": base64.b64encode(compress(raw, encoding)).decode("ascii"),
+            "isBase64Encoded": True,
+        }
+
+    return {
+        "statusCode": status_code,
+        "headers": response_headers,
+        "body": raw.decode("utf-8") if isinstance(raw, bytes) else raw,
+    }
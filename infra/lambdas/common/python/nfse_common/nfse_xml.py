@@ -0,0 +1,231 @@
+# Geração do XML da NFS-e (RPS no padrão ABRASF) a partir do payload da invoice
+import collections, decimal, functools, gzip, hashlib, re
+
+# Layout de um provedor/município: namespace, elemento raiz e formatação numérica
+Layout = collections.namedtuple(
+    "Layout", ["name", "namespace", "root", "rps_series", "aliquota_places"]
+)
+
+# Layouts suportados (o padrão nacional ABRASF 2.04 atende a maioria dos municípios)
+LAYOUTS = {
+    "abrasf-2.04": Layout(
+        name="abrasf-2.04",
+        namespace="http://www.abrasf.org.br/nfse.xsd",
+        root="GerarNfseEnvio",
+        rps_series="1",
+        aliquota_places=2,
+    ),
+}
+DEFAULT_LAYOUT = "abrasf-2.04"
+
+# Municípios (código IBGE) que usam um layout diferente do padrão
+MUNICIPALITY_LAYOUTS = {}
+
+# Campos do payload que alimentam elementos obrigatórios do XSD (Prestador/CpfCnpj,
+# ValorServicos, ItemListaServico, Discriminacao, CodigoMunicipio); sem eles o
+# documento seria inválido, então a geração falha em vez de omiti-los
+REQUIRED_FIELDS = (
+    "companyCnpj",
+    "total",
+    "serviceCode",
+    "description",
+    "municipalityCode",
+)
+
+# Caracteres que precisam de escape e caracteres proibidos no XML 1.0
+_NEEDS_ESCAPE = re.compile(r"[&<>\"\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+_INVALID_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+_CENTS = decimal.Decimal("0.01")
+
+
+def escape(value):
+    # Escapa texto/atributo; o caminho rápido evita trabalho em strings comuns
+    value = str(value)
+    if not _NEEDS_ESCAPE.search(value):
+        return value
+    return _INVALID_CHARS.sub("", value).translate(_ESCAPES)
+
+
+class XmlWriter:
+    # Builder em streaming: emite pedaços de texto sem montar uma árvore DOM
+
+    def __init__(self, write=None):
+        self._chunks = []
+        self._write = write or self._chunks.append
+        self._stack = []
+
+    def start(self, tag, attrs=None):
+        # Abre um elemento, com atributos opcionais
+        if attrs:
+            rendered = "".join(f' {k}="{escape(v)}"' for k, v in attrs.items())
+            self._write(f"<{tag}{rendered}>")
+        else:
+            self._write(f"<{tag}>")
+        self._stack.append(tag)
+
+    def end(self):
+        # Fecha o último elemento aberto
+        self._write(f"</{self._stack.pop()}>")
+
+    def element(self, tag, value):
+        # Escreve um elemento simples; valores None são omitidos
+        if value is None or value == "":
+            return
+        self._write(f"<{tag}>{escape(value)}</{tag}>")
+
+    def raw(self, text):
+        # Escreve texto já pronto (ex: cabeçalho pré-renderizado do layout)
+        self._write(text)
+
+    def getvalue(self):
+        # Retorna o documento acumulado (apenas quando usa o buffer interno)
+        if self._stack:
+            raise ValueError(f"Unclosed elements: {self._stack}")
+        return "".join(self._chunks)
+
+
+def get_layout(municipality_code):
+    # Resolve o layout do município (lookup em dicionário, sem cache por código)
+    name = MUNICIPALITY_LAYOUTS.get(str(municipality_code or ""), DEFAULT_LAYOUT)
+    return LAYOUTS[name]
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    # Partes fixas do documento, renderizadas uma única vez por layout; a chave é
+    # o nome do layout, então o cache fica limitado ao tamanho de LAYOUTS
+    layout = LAYOUTS[name]
+    header = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<{layout.root} xmlns="{layout.namespace}">'
+    )
+    return header, f"</{layout.root}>"
+
+
+def _money(value):
+    # Formata valores monetários com duas casas decimais
+    return str(decimal.Decimal(str(value)).quantize(_CENTS, decimal.ROUND_HALF_UP))
+
+
+def _rate(value, places):
+    # Formata a alíquota com o número de casas exigido pelo layout
+    quantum = decimal.Decimal(1).scaleb(-places)
+    return str(decimal.Decimal(str(value)).quantize(quantum, decimal.ROUND_HALF_UP))
+
+
+def _flag(value):
+    # Booleanos no padrão ABRASF: 1 = Sim, 2 = Não
+    return "1" if value else "2"
+
+
+def _digits(value):
+    # Mantém apenas os dígitos (CPF/CNPJ/CEP podem vir formatados)
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+
+def _write_document(w, document):
+    # CpfCnpj: CPF com 11 dígitos, CNPJ com 14 (pode ser alfanumérico)
+    document = re.sub(r"[^0-9A-Za-z]", "", str(document or "")).upper()
+    if not document:
+        return
+    w.start("CpfCnpj")
+    w.element("Cpf" if len(document) == 11 else "Cnpj", document)
+    w.end()
+
+
+def _write_customer(w, customer):
+    # Dados do tomador do serviço (todos opcionais no layout)
+    if not customer:
+        return
+    w.start("TomadorServico")
+    if customer.get("document"):
+        w.start("IdentificacaoTomador")
+        _write_document(w, customer["document"])
+        w.end()
+    w.element("RazaoSocial", customer.get("name"))
+    address = customer.get("address")
+    if address:
+        w.start("Endereco")
+        w.element("Endereco", address.get("street"))
+        w.element("Numero", address.get("number"))
+        w.element("Complemento", address.get("complement"))
+        w.element("Bairro", address.get("district"))
+        w.element("CodigoMunicipio", address.get("municipalityCode"))
+        w.element("Uf", address.get("state"))
+        w.element("Cep", _digits(address.get("zipCode")))
+        w.end()
+    if customer.get("phone") or customer.get("email"):
+        w.start("Contato")
+        w.element("Telefone", _digits(customer.get("phone")))
+        w.element("Email", customer.get("email"))
+        w.end()
+    w.end()
+
+
+def write_nfse(w, invoice_id, payload, created_at):
+    # Escreve o documento completo da NFS-e no writer informado
+    missing = [f for f in REQUIRED_FIELDS if payload.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing required NFS-e fields: {', '.join(missing)}")
+    layout = get_layout(payload["municipalityCode"])
+    header, footer = _template(layout.name)
+    issue_date = created_at[:10]
+    rps_number = payload.get("rpsNumber") or int(invoice_id, 16)
+
+    w.raw(header)
+    w.start("Rps")
+    w.start("InfDeclaracaoPrestacaoServico", {"Id": f"rps{invoice_id}"})
+
+    w.start("Rps")
+    w.start("IdentificacaoRps")
+    w.element("Numero", rps_number)
+    w.element("Serie", payload.get("rpsSeries") or layout.rps_series)
+    w.element("Tipo", "1")
+    w.end()
+    w.element("DataEmissao", issue_date)
+    w.element("Status", "1")
+    w.end()
+    w.element("Competencia", payload.get("competence") or issue_date)
+
+    w.start("Servico")
+    w.start("Valores")
+    w.element("ValorServicos", _money(payload["total"]))
+    if payload.get("deductions") is not None:
+        w.element("ValorDeducoes", _money(payload["deductions"]))
+    if payload.get("issRate") is not None:
+        w.element("Aliquota", _rate(payload["issRate"], layout.aliquota_places))
+    w.end()
+    w.element("IssRetido", _flag(payload.get("issWithheld")))
+    w.element("ItemListaServico", payload["serviceCode"])
+    w.element("CodigoCnae", payload.get("cnaeCode"))
+    w.element("Discriminacao", payload["description"])
+    w.element("CodigoMunicipio", payload["municipalityCode"])
+    w.element("ExigibilidadeISS", "1")
+    w.end()
+
+    w.start("Prestador")
+    _write_document(w, payload["companyCnpj"])
+    w.element("InscricaoMunicipal", payload.get("companyMunicipalRegistration"))
+    w.end()
+
+    _write_customer(w, payload.get("customer"))
+
+    w.element("OptanteSimplesNacional", _flag(payload.get("simplesNacional")))
+    w.element("IncentivoFiscal", "2")
+
+    w.end()
+    w.end()
+    w.raw(footer)
+
+
+def render_nfse(invoice_id, payload, created_at, compress=False):
+    # Gera o XML e devolve (corpo, sha256 do XML sem compressão)
+    w = XmlWriter()
+    write_nfse(w, invoice_id, payload, created_at)
+    xml = w.getvalue().encode("utf-8")
+    digest = hashlib.sha256(xml).hexdigest()
+    if compress:
+        xml = gzip.compress(xml, compresslevel=6, mtime=0)
+    return xml, digest
@@ -0,0 +1,345 @@
+# Validação do payload de emissão, compilada uma única vez no carregamento do módulo
+import datetime, decimal, math, re
+
+from nfse_common.http import parse_json_body
+from nfse_common.nfse_xml import LAYOUTS
+
+# Tamanho máximo do corpo da requisição (bytes) aceito pela emissão
+MAX_BODY_BYTES = 64 * 1024
+
+_CENTS = decimal.Decimal("0.01")
+_MONEY_STR = re.compile(r"^\d{1,13}(\.\d{1,2})?$")
+_DECIMAL_STR = re.compile(r"^\d{1,13}(\.\d{1,13})?$")
+# Casas da alíquota aceitas: as que todo layout escreve sem arredondar
+_RATE_PLACES = min(layout.aliquota_places for layout in LAYOUTS.values())
+# Só o formato YYYY-MM-DD; a data em si é conferida com date.fromisoformat
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_SERVICE_CODE = re.compile(r"^\d{2}\.\d{2}$")
+_STATE = re.compile(r"^[A-Z]{2}$")
+# Pontuação aceita em CPF/CNPJ/CEP/telefone formatados
+_PUNCTUATION = str.maketrans("", "", ".-/() ")
+# CNPJ numérico ou alfanumérico (12 posições [0-9A-Z] + 2 dígitos verificadores)
+_CNPJ = re.compile(r"^[0-9A-Z]{12}\d{2}$")
+_CPF = re.compile(r"^\d{11}$")
+
+_CNPJ_WEIGHTS = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def _cnpj_ok(cnpj):
+    # Confere os dígitos verificadores (módulo 11); letras valem ord(c) - 48
+    if len(set(cnpj)) == 1:
+        return False
+    values = [ord(c) - 48 for c in cnpj]
+    for size in (12, 13):
+        weights = _CNPJ_WEIGHTS[13 - size :]
+        rest = sum(v * w for v, w in zip(values[:size], weights)) % 11
+        if values[size] != (0 if rest < 2 else 11 - rest):
+            return False
+    return True
+
+
+def _cpf_ok(cpf):
+    # Confere os dígitos verificadores do CPF
+    if len(set(cpf)) == 1:
+        return False
+    values = [int(c) for c in cpf]
+    for size in (9, 10):
+        total = sum(v * w for v, w in zip(values[:size], range(size + 1, 1, -1)))
+        if values[size] != total * 10 % 11 % 10:
+            return False
+    return True
+
+
+def _to_decimal(value, pattern):
+    # Converte número JSON ou string numérica em Decimal (ou None se inválido)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return decimal.Decimal(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        return decimal.Decimal(repr(value))
+    if isinstance(value, str) and pattern.match(value):
+        return decimal.Decimal(value)
+    return None
+
+
+# Compiladores: cada um recebe as opções do campo e devolve uma função
+# check(value) -> (valor_normalizado, mensagem_de_erro_ou_None)
+
+
+def _compile_cnpj(spec):
+    def check(value):
+        if not isinstance(value, str):
+            return None, "must be a string"
+        cnpj = value.translate(_PUNCTUATION).upper()
+        if not _CNPJ.match(cnpj):
+            return None, "must have 14 characters"
+        if not _cnpj_ok(cnpj):
+            return None, "invalid CNPJ check digits"
+        return cnpj, None
+
+    return check
+
+
+def _compile_document(spec):
+    # CPF (11 dígitos) ou CNPJ (14 posições)
+    check_cnpj = _compile_cnpj(spec)
+
+    def check(value):
+        if not isinstance(value, str):
+            return None, "must be a string"
+        document = value.translate(_PUNCTUATION).upper()
+        if _CPF.match(document):
+            if not _cpf_ok(document):
+                return None, "invalid CPF check digits"
+            return document, None
+        return check_cnpj(document)
+
+    return check
+
+
+def _compile_money(spec):
+    minimum = decimal.Decimal(spec.get("min", "0"))
+    maximum = decimal.Decimal(spec.get("max", "9999999999.99"))
+
+    def check(value):
+        amount = _to_decimal(value, _MONEY_STR)
+        if amount is None:
+            return None, "must be a number"
+        # Confere a faixa antes do quantize, que estoura para valores muito grandes
+        if amount < minimum or amount > maximum:
+            return None, f"must be between {minimum} and {maximum}"
+        if amount != amount.quantize(_CENTS):
+            return None, "must have at most 2 decimal places"
+        return amount, None
+
+    return check
+
+
+def _compile_decimal(spec):
+    minimum = decimal.Decimal(spec.get("min", "0"))
+    maximum = decimal.Decimal(spec["max"])
+    places = spec["places"]
+    quantum = decimal.Decimal(1).scaleb(-places)
+
+    def check(value):
+        number = _to_decimal(value, _DECIMAL_STR)
+        if number is None:
+            return None, "must be a number"
+        if number < minimum or number > maximum:
+            return None, f"must be between {minimum} and {maximum}"
+        # Vale para string e float: o valor aceito nunca é arredondado no XML
+        if number != number.quantize(quantum):
+            return None, f"must have at most {places} decimal places"
+        return number, None
+
+    return check
+
+
+def _compile_digits(spec):
+    # Sequência de dígitos com tamanho fixo ou máximo (pontuação é ignorada)
+    size, max_len = spec.get("size"), spec.get("max_len")
+
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, (str, int)):
+            return None, "must be a string of digits"
+        digits = str(value).translate(_PUNCTUATION)
+        if not digits.isdigit() or not digits.isascii():
+            return None, "must contain only digits"
+        if size and len(digits) != size:
+            return None, f"must have {size} digits"
+        if max_len and len(digits) > max_len:
+            return None, f"must have at most {max_len} digits"
+        return digits, None
+
+    return check
+
+
+def _compile_string(spec):
+    max_len, pattern = spec["max_len"], spec.get("pattern")
+
+    def check(value):
+        if not isinstance(value, str):
+            return None, "must be a string"
+        value = value.strip()
+        if not value:
+            return None, "must not be empty"
+        if len(value) > max_len:
+            return None, f"must have at most {max_len} characters"
+        if pattern and not pattern.match(value):
+            return None, "has an invalid format"
+        return value, None
+
+    return check
+
+
+def _compile_date(spec):
+    # Data ISO (YYYY-MM-DD) que precisa existir no calendário (xs:date no XML)
+    def check(value):
+        if not isinstance(value, str) or not _DATE.match(value):
+            return None, "must be a date in YYYY-MM-DD format"
+        try:
+            datetime.date.fromisoformat(value)
+        except ValueError:
+            return None, "must be a valid calendar date"
+        return value, None
+
+    return check
+
+
+def _compile_bool(spec):
+    def check(value):
+        if not isinstance(value, bool):
+            return None, "must be a boolean"
+        return value, None
+
+    return check
+
+
+def _compile_int(spec):
+    minimum, maximum = spec.get("min", 1), spec["max"]
+
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, int):
+            return None, "must be an integer"
+        if value < minimum or value > maximum:
+            return None, f"must be between {minimum} and {maximum}"
+        return value, None
+
+    return check
+
+
+def _compile_object(spec):
+    # Objeto aninhado: compila os campos filhos e junta os erros com prefixo
+    fields = [
+        (
+            name,
+            field.get("required", False),
+            field["type"] == "object",
+            _COMPILERS[field["type"]](field),
+        )
+        for name, field in spec["fields"].items()
+    ]
+
+    def check(value, prefix=""):
+        if not isinstance(value, dict):
+            return None, "must be an object"
+        clean, errors = {}, {}
+        for name, required, nested, field_check in fields:
+            raw = value.get(name)
+            if raw is None:
+                if required:
+                    errors[prefix + name] = "is required"
+                continue
+            if nested:
+                result, field_errors = field_check(raw, f"{prefix}{name}.")
+                if isinstance(field_errors, dict):
+                    errors.update(field_errors)
+                else:
+                    errors[prefix + name] = field_errors
+            else:
+                result, error = field_check(raw)
+                if error:
+                    errors[prefix + name] = error
+            if result is not None:
+                clean[name] = result
+        return clean, errors
+
+    return check
+
+
+_COMPILERS = {
+    "cnpj": _compile_cnpj,
+    "document": _compile_document,
+    "money": _compile_money,
+    "decimal": _compile_decimal,
+    "digits": _compile_digits,
+    "string": _compile_string,
+    "date": _compile_date,
+    "bool": _compile_bool,
+    "int": _compile_int,
+    "object": _compile_object,
+}
+
+# Esquema do payload de POST /invoices (nomes iguais aos usados no XML da NFS-e);
+# os obrigatórios cobrem nfse_xml.REQUIRED_FIELDS, exigidos pelo XSD ABRASF
+INVOICE_SCHEMA = {
+    "type": "object",
+    "fields": {
+        "companyCnpj": {"type": "cnpj", "required": True},
+        "total": {"type": "money", "required": True, "min": "0.01"},
+        "companyMunicipalRegistration": {"type": "digits", "max_len": 15},
+        "municipalityCode": {"type": "digits", "size": 7, "required": True},
+        "deductions": {"type": "money"},
+        "issRate": {"type": "decimal", "max": "100", "places": _RATE_PLACES},
+        "issWithheld": {"type": "bool"},
+        "serviceCode": {
+            "type": "string",
+            "max_len": 5,
+            "pattern": _SERVICE_CODE,
+            "required": True,
+        },
+        "cnaeCode": {"type": "digits", "size": 7},
+        "description": {"type": "string", "max_len": 2000, "required": True},
+        "simplesNacional": {"type": "bool"},
+        "rpsNumber": {"type": "int", "max": 999999999999999},
+        "rpsSeries": {"type": "string", "max_len": 5},
+        "competence": {"type": "date"},
+        "customer": {
+            "type": "object",
+            "fields": {
+                "document": {"type": "document"},
+                "name": {"type": "string", "max_len": 150},
+                "email": {"type": "string", "max_len": 80, "pattern": _EMAIL},
+                "phone": {"type": "digits", "max_len": 20},
+                "address": {
+                    "type": "object",
+                    "fields": {
+                        "street": {"type": "string", "max_len": 125},
+                        "number": {"type": "string", "max_len": 10},
+                        "complement": {"type": "string", "max_len": 60},
+                        "district": {"type": "string", "max_len": 60},
+                        "municipalityCode": {"type": "digits", "size": 7},
+                        "state": {"type": "string", "max_len": 2, "pattern": _STATE},
+                        "zipCode": {"type": "digits", "size": 8},
+                    },
+                },
+            },
+        },
+    },
+}
+
+# Validador compilado no import (reaproveitado por todas as invocações do container)
+_check_invoice = _compile_object(INVOICE_SCHEMA)
+
+
+def validate_invoice(payload):
+    # Valida e normaliza o payload de emissão; devolve (dados_limpos, erros_por_campo)
+    clean, errors = _check_invoice(payload)
+    if isinstance(errors, str):
+        return None, {"body": errors}
+    if not errors and "deductions" in clean and clean["deductions"] > clean["total"]:
+        errors["deductions"] = "must not exceed total"
+    return clean, errors
+
+
+def parse_invoice_request(event):
+    # Lê e valida o corpo de POST /invoices sem nenhuma chamada à AWS;
+    # devolve (dados_limpos, erros_por_campo)
+    body = event.get("body") or ""
+    limit = MAX_BODY_BYTES
+    if event.get("isBase64Encoded"):
+        limit = (MAX_BODY_BYTES + 2) // 3 * 4
+    # Mede em bytes UTF-8 (len() conta caracteres; só difere fora do ASCII)
+    size = len(body) if body.isascii() else len(body.encode("utf-8"))
+    if size > limit:
+        return None, {"body": f"must have at most {MAX_BODY_BYTES} bytes"}
+    try:
+        payload = parse_json_body(event)
+    # RecursionError: aninhamento excessivo (ex: "[[[...]]]") dentro do limite
+    except (ValueError, RecursionError):
+        return None, {"body": "must be valid JSON"}
+    return validate_invoice(payload)
@@ -1,17 +1,13 @@
-# Importa módulos necessários para manipulação de JSON, variáveis de ambiente e AWS
-import json, os, boto3
+# Importa módulos necessários para manipulação de variáveis de ambiente e AWS
+import os, boto3
+
+# Utilitários compartilhados (Layer) para montar as respostas HTTP
+from nfse_common.http import json_response
 
 # Inicializa o cliente DynamoDB
 ddb = boto3.client("dynamodb")
 # Obtém o nome da tabela de invoices a partir da variável de ambiente
 TABLE_INVOICES = os.environ["TABLE_INVOICES"]
-# Define os cabeçalhos CORS para permitir requisições de outros domínios
-CORS = {
-    "Content-Type": "application/json",
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization,x-api-key",
-    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
-}
 
 
 def lambda_handler(event, context):
@@ -24,7 +20,7 @@ def lambda_handler(event, context):
         # Extrai o invoice_id dos parâmetros
         if not invoice_id:
             # Valida se o parâmetro 'id' foi informado
-            return {"statusCode": 400, "body": "Missing id"}
+            return json_response(400, {"message": "Missing id"}, event)
 
         # Busca o item no DynamoDB pela chave invoiceId
         res = ddb.get_item(
@@ -34,7 +30,7 @@ def lambda_handler(event, context):
         item = res.get("Item")
         if not item:
             # Se não encontrar, retorna 404
-            return {"statusCode": 404, "body": "Not found"}
+            return json_response(404, {"message": "Not found"}, event)
 
         # Converte o formato do DynamoDB para dicionário simples
         data = {k: list(v.values())[0] for k, v in item.items()}
@@ -45,12 +41,8 @@ def lambda_handler(event, context):
             except:
                 pass
         # Retorna os dados encontrados
-        return {
-            "statusCode": 200,
-            "headers": CORS,
-            "body": json.dumps(data),
-        }
+        return json_response(200, data, event)
     # Captura qualquer erro inesperado, loga e retorna erro 500
     except Exception as e:
         print("ERROR:", e)
-        return {"statusCode": 500, "body": json.dumps({"message": "Internal error"})}
+        return json_response(500, {"message": "Internal error"}, event)
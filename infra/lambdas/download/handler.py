@@ -0,0 +1,162 @@
+# Importa módulos necessários para manipulação de variáveis de ambiente, tempo e AWS
+import os, time, boto3
+
+# Configuração do cliente S3 (assinatura v4, exigida para presigned URLs)
+from botocore.config import Config
+
+# Utilitários compartilhados (Layer) para montar as respostas HTTP
+from nfse_common.http import json_response, parse_json_body
+
+# Inicializa clientes AWS: DynamoDB e S3
+ddb = boto3.client("dynamodb")
+s3 = boto3.client("s3", config=Config(signature_version="s3v4"))
+
+# Obtém nomes de recursos a partir das variáveis de ambiente
+TABLE_INVOICES = os.environ["TABLE_INVOICES"]
+BUCKET_DOCS = os.environ["BUCKET_DOCS"]
+# Validade das URLs assinadas (segundos) e margem para renová-las antes de expirar
+URL_TTL = int(os.environ.get("XML_URL_TTL", "300"))
+URL_RENEW_MARGIN = int(os.environ.get("XML_URL_RENEW_MARGIN", "60"))
+# Limites do cache de URLs no container e do lote por requisição
+URL_CACHE_MAX = 5000
+BATCH_MAX_IDS = 100
+
+# Cache de URLs assinadas por chave do S3 (reaproveitado entre invocações "quentes")
+_url_cache = {}
+
+
+def _evict(now):
+    # Remove entradas expiradas; se ainda estiver cheio, descarta as mais antigas
+    expired = [
+        k for k, (_, exp) in _url_cache.items() if exp - now <= URL_RENEW_MARGIN
+    ]
+    for key in expired:
+        del _url_cache[key]
+    while len(_url_cache) >= URL_CACHE_MAX:
+        del _url_cache[next(iter(_url_cache))]
+
+
+def presign(xml_key, download=False):
+    # Devolve (url, expiresAt) para a chave, reutilizando a URL do cache enquanto
+    # ainda faltar mais que a margem de renovação para expirar
+    now = time.time()
+    cache_key = (xml_key, download)
+    cached = _url_cache.get(cache_key)
+    if cached and cached[1] - now > URL_RENEW_MARGIN:
+        return cached
+
+    params = {"Bucket": BUCKET_DOCS, "Key": xml_key}
+    if download:
+        filename = xml_key.rsplit("/", 1)[-1]
+        params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+    url = s3.generate_presigned_url("get_object", Params=params, ExpiresIn=URL_TTL)
+
+    if len(_url_cache) >= URL_CACHE_MAX:
+        _evict(now)
+    _url_cache[cache_key] = (url, int(now) + URL_TTL)
+    return _url_cache[cache_key]
+
+
+def _xml_key(item):
+    # Usa a chave gravada na emissão; notas antigas seguem a convenção xml/{id}.xml
+    if "xmlKey" in item:
+        return item["xmlKey"]["S"]
+    return f"xml/{item['invoiceId']['S']}.xml"
+
+
+def _is_enabled(params, name):
+    # Interpreta flags de query string (?redirect=true, ?download=1)
+    return (params.get(name) or "").lower() in ("1", "true", "yes")
+
+
+def get_xml_url(event):
+    # GET /invoices/{id}/xml: confere a nota uma única vez e devolve a URL assinada
+    invoice_id = (event.get("pathParameters") or {}).get("id")
+    if not invoice_id:
+        return json_response(400, {"message": "Missing id"}, event)
+
+    res = ddb.get_item(
+        TableName=TABLE_INVOICES,
+        Key={"invoiceId": {"S": invoice_id}},
+        ProjectionExpression="invoiceId, xmlKey",
+    )
+    item = res.get("Item")
+    if not item:
+        return json_response(404, {"message": "Not found"}, event)
+
+    query = event.get("queryStringParameters") or {}
+    url, expires_at = presign(_xml_key(item), _is_enabled(query, "download"))
+    payload = {"invoiceId": invoice_id, "url": url, "expiresAt": expires_at}
+    if _is_enabled(query, "redirect"):
+        # Redireciona o cliente direto ao S3 (sem passar pela Lambda). Range só
+        # vale sobre o XML quando XML_GZIP=false; com gzip, recorta os bytes comprimidos
+        return json_response(302, payload, event, headers={"Location": url})
+    return json_response(200, payload, event)
+
+
+def _batch_get(ids):
+    # Busca as notas em lotes de 100 (limite do BatchGetItem), tratando UnprocessedKeys
+    items = []
+    for start in range(0, len(ids), 100):
+        request = {
+            TABLE_INVOICES: {
+                "Keys": [{"invoiceId": {"S": i}} for i in ids[start : start + 100]],
+                "ProjectionExpression": "invoiceId, xmlKey",
+            }
+        }
+        for attempt in range(5):
+            res = ddb.batch_get_item(RequestItems=request)
+            items.extend(res.get("Responses", {}).get(TABLE_INVOICES, []))
+            request = res.get("UnprocessedKeys") or {}
+            if not request:
+                break
+            time.sleep(0.05 * 2**attempt)
+        else:
+            raise RuntimeError("BatchGetItem left unprocessed keys")
+    return items
+
+
+def get_xml_urls(event):
+    # POST /invoices/xml com {"ids": [...]}: assina as URLs de várias notas de uma vez
+    try:
+        body = parse_json_body(event)
+    except (ValueError, RecursionError):
+        return json_response(400, {"message": "Body must be valid JSON"}, event)
+    if not isinstance(body, dict):
+        return json_response(400, {"message": "Body must be a JSON object"}, event)
+    ids = body.get("ids")
+    if not isinstance(ids, list) or not all(isinstance(i, str) and i for i in ids):
+        return json_response(400, {"message": "ids must be a list of strings"}, event)
+    # Remove duplicados preservando a ordem (BatchGetItem rejeita chaves repetidas)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > BATCH_MAX_IDS:
+        return json_response(
+            400, {"message": f"At most {BATCH_MAX_IDS} ids per request"}, event
+        )
+
+    # Só aceita booleano JSON: "false"/"0" não podem virar True por truthiness
+    download = body.get("download", False)
+    if not isinstance(download, bool):
+        return json_response(400, {"message": "download must be a boolean"}, event)
+    found = {item["invoiceId"]["S"]: item for item in _batch_get(ids)}
+    results = []
+    for invoice_id in ids:
+        if invoice_id in found:
+            url, expires_at = presign(_xml_key(found[invoice_id]), download)
+            results.append(
+                {"invoiceId": invoice_id, "url": url, "expiresAt": expires_at}
+            )
+    not_found = [i for i in ids if i not in found]
+    return json_response(200, {"items": results, "notFound": not_found}, event)
+
+
+def lambda_handler(event, context):
+    # Função principal Lambda, chamada a cada requisição
+    try:
+        if event.get("httpMethod") == "POST":
+            return get_xml_urls(event)
+        return get_xml_url(event)
+    # Captura qualquer erro inesperado, loga e retorna erro 500
+    except Exception as e:
+        print("ERROR:", e)
+        return json_response(500, {"message": "Internal error"}, event)
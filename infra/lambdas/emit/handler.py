@@ -1,5 +1,12 @@
-# Importa módulos necessários para manipulação de JSON, variáveis de ambiente, datas, UUID e AWS
-import json, os, uuid, datetime, boto3
+# Importa módulos necessários para manipulação de variáveis de ambiente, datas, UUID e AWS
+import os, uuid, datetime, boto3
+
+# Utilitários compartilhados (Layer) para montar as respostas HTTP
+from nfse_common.http import dumps, json_response
+# Gerador do XML da NFS-e (Layer)
+from nfse_common.nfse_xml import render_nfse
+# Validação do payload de emissão, compilada no import (Layer)
+from nfse_common.validation import parse_invoice_request
 
 # Inicializa clientes AWS: DynamoDB, S3 e Step Functions
 ddb = boto3.client("dynamodb")
@@ -10,32 +17,37 @@ sfn = boto3.client("stepfunctions")
 TABLE_INVOICES = os.environ["TABLE_INVOICES"]
 BUCKET_DOCS = os.environ["BUCKET_DOCS"]
 SFN_ARN = os.environ.get("SFN_ARN")
-# Define os cabeçalhos CORS para permitir requisições de outros domínios
-CORS = {
-    "Content-Type": "application/json",
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization,x-api-key",
-    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
-}
+# Define se o XML é gravado comprimido (gzip) no S3
+XML_GZIP = os.environ.get("XML_GZIP", "false").lower() == "true"
 
 
 def lambda_handler(event, context):
     # Função principal Lambda, chamada a cada requisição
     try:
-        # Obtém o corpo da requisição (JSON)
-        body = json.loads(event.get("body") or "{}")
+        # Valida o corpo da requisição antes de qualquer chamada à AWS
+        body, errors = parse_invoice_request(event)
+        if errors:
+            return json_response(
+                400, {"message": "Invalid request", "errors": errors}, event
+            )
         # Gera um invoice_id único (12 caracteres)
         invoice_id = uuid.uuid4().hex[:12]
         # Gera timestamp atual em formato ISO
         now = datetime.datetime.utcnow().isoformat() + "Z"
+        xml_key = f"xml/{invoice_id}.xml"
+
+        # Gera o XML da nota fiscal (e o hash do conteúdo) antes de gravar o estado
+        xml, xml_sha256 = render_nfse(invoice_id, body, now, compress=XML_GZIP)
 
         # Monta o registro para salvar no DynamoDB
         record = {
             "invoiceId": {"S": invoice_id},
-            "companyCnpj": {"S": str(body.get("companyCnpj", "00000000000000"))},
+            "companyCnpj": {"S": body["companyCnpj"]},
             "status": {"S": "EMITTED"},
             "createdAt": {"S": now},
-            "total": {"N": str(body.get("total", 0))},
+            "total": {"N": str(body["total"])},
+            "xmlKey": {"S": xml_key},
+            "xmlSha256": {"S": xml_sha256},
         }
 
         # Salva o registro na tabela DynamoDB, garantindo que não exista outro com o mesmo id
@@ -45,41 +57,44 @@ def lambda_handler(event, context):
             ConditionExpression="attribute_not_exists(invoiceId)",
         )
 
-        # Gera o XML da nota fiscal e salva no S3
-        xml = f"<NFS-e><Id>{invoice_id}</Id><Status>EMITTED</Status><Date>{now}</Date></NFS-e>"
+        # Salva o XML no S3 (com Content-Encoding quando comprimido)
+        extra = {"ContentEncoding": "gzip"} if XML_GZIP else {}
         s3.put_object(
             Bucket=BUCKET_DOCS,
-            Key=f"xml/{invoice_id}.xml",
-            Body=xml.encode("utf-8"),
+            Key=xml_key,
+            Body=xml,
             ContentType="application/xml",
+            Metadata={"sha256": xml_sha256},
+            **extra,
         )
 
         # Dispara a State Machine para enfileirar no SQS (se configurado)
         if SFN_ARN:
             payload = {
                 "invoiceId": invoice_id,
-                "companyCnpj": body.get("companyCnpj", "00000000000000"),
-                "total": body.get("total", 0),
+                "companyCnpj": body["companyCnpj"],
+                "total": body["total"],
                 "status": "EMITTED",
-                "xmlKey": f"xml/{invoice_id}.xml",
+                "xmlKey": xml_key,
+                "xmlSha256": xml_sha256,
                 "createdAt": now,
             }
             # Inicia execução da State Machine
-            sfn.start_execution(stateMachineArn=SFN_ARN, input=json.dumps(payload))
+            sfn.start_execution(
+                stateMachineArn=SFN_ARN, input=dumps(payload).decode("utf-8")
+            )
 
         # Retorna resposta de sucesso com dados da nota emitida
-        return {
-            "statusCode": 201,
-            "headers": CORS,
-            "body": json.dumps(
-                {
-                    "invoiceId": invoice_id,
-                    "status": "EMITTED",
-                    "xmlKey": f"xml/{invoice_id}.xml",
-                }
-            ),
-        }
+        return json_response(
+            201,
+            {
+                "invoiceId": invoice_id,
+                "status": "EMITTED",
+                "xmlKey": xml_key,
+            },
+            event,
+        )
     # Captura qualquer erro inesperado, loga e retorna erro 500
     except Exception as e:
         print("ERROR:", e)
-        return {"statusCode": 500, "body": json.dumps({"message": "Internal error"})}
+        return json_response(500, {"message": "Internal error"}, event)
@@ -1,20 +1,8 @@
-# Importa módulo para manipulação de JSON
-import json
-
-# Define os cabeçalhos CORS para permitir requisições de outros domínios
-CORS = {
-    "Content-Type": "application/json",
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization,x-api-key",
-    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
-}
+# Utilitários compartilhados (Layer) para montar as respostas HTTP
+from nfse_common.http import json_response
 
 
 # Função principal Lambda, chamada a cada requisição
 def lambda_handler(event, context):
     # Retorna resposta de sucesso para indicar que o serviço está online
-    return {
-        "statusCode": 200,
-        "headers": CORS,
-        "body": json.dumps({"ok": True}),
-    }
+    return json_response(200, {"ok": True}, event)
@@ -3,6 +3,7 @@ from typing import Any
 from constructs import Construct
 from aws_cdk import (
     Stack,  # Classe base para stacks do CDK
+    BundlingOptions,  # Empacotamento de assets com dependências (via Docker)
     CfnOutput,  # Para exportar valores após o deploy
     RemovalPolicy,  # Política de remoção de recursos
     Duration,  # Utilitário para definir tempos
@@ -171,6 +172,21 @@ class RobustNfseStack(Stack):
             enforce_ssl=True,
             removal_policy=RemovalPolicy.DESTROY,
             auto_delete_objects=True,
+            # CORS para o navegador baixar o XML pelas presigned URLs (inclusive
+            # com Range) e ler os cabeçalhos da resposta parcial via script
+            cors=[
+                s3.CorsRule(
+                    allowed_methods=[s3.HttpMethods.GET, s3.HttpMethods.HEAD],
+                    allowed_origins=["*"],
+                    allowed_headers=["Range"],
+                    exposed_headers=[
+                        "Content-Range",
+                        "Accept-Ranges",
+                        "Content-Length",
+                    ],
+                    max_age=3000,
+                )
+            ],
         )
 
         # Criação do User Pool Cognito para autenticação de usuários
@@ -217,11 +233,35 @@ class RobustNfseStack(Stack):
         # - get_fn: consulta de invoice
         # - cancel_fn: cancelamento de invoice
         # - ping_fn: endpoint público de saúde
+        # - xml_fn: URLs assinadas para download do XML
         common_env = {
             "TABLE_INVOICES": invoices.table_name,
             "TABLE_REQUESTS": requests.table_name,
             "BUCKET_DOCS": docs_bucket.bucket_name,
         }
+        # Layer com o código compartilhado entre as Lambdas da API
+        # (montagem de respostas JSON, CORS e compressão). O bundling instala
+        # orjson/brotli (lambdas/common/requirements.txt) na imagem do runtime;
+        # por isso o synth/deploy exige Docker
+        common_layer = _lambda.LayerVersion(
+            self,
+            "CommonLayer",
+            code=_lambda.Code.from_asset(
+                os.path.join(os.path.dirname(__file__), "lambdas/common"),
+                bundling=BundlingOptions(
+                    image=_lambda.Runtime.PYTHON_3_12.bundling_image,
+                    command=[
+                        "bash",
+                        "-c",
+                        "pip install --no-cache-dir -r requirements.txt"
+                        " -t /asset-output/python"
+                        " && cp -r python/. /asset-output/python/",
+                    ],
+                ),
+            ),
+            compatible_runtimes=[_lambda.Runtime.PYTHON_3_12],
+            description="Utilitarios compartilhados das Lambdas da API NFS-e",
+        )
         emit_fn = _lambda.Function(
             self,
             "EmitFn",
@@ -231,6 +271,7 @@ class RobustNfseStack(Stack):
                 os.path.join(os.path.dirname(__file__), "lambdas/emit")
             ),
             environment=common_env,
+            layers=[common_layer],
             timeout=Duration.seconds(15),
         )
         get_fn = _lambda.Function(
@@ -242,6 +283,7 @@ class RobustNfseStack(Stack):
                 os.path.join(os.path.dirname(__file__), "lambdas/consult")
             ),
             environment=common_env,
+            layers=[common_layer],
             timeout=Duration.seconds(10),
         )
         cancel_fn = _lambda.Function(
@@ -253,6 +295,7 @@ class RobustNfseStack(Stack):
                 os.path.join(os.path.dirname(__file__), "lambdas/cancel")
             ),
             environment=common_env,
+            layers=[common_layer],
             timeout=Duration.seconds(10),
         )
         ping_fn = _lambda.Function(
@@ -263,14 +306,29 @@ class RobustNfseStack(Stack):
             code=_lambda.Code.from_asset(
                 os.path.join(os.path.dirname(__file__), "lambdas/ping")
             ),
+            layers=[common_layer],
             timeout=Duration.seconds(5),
         )
+        xml_fn = _lambda.Function(
+            self,
+            "XmlDownloadFn",
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            handler="handler.lambda_handler",
+            code=_lambda.Code.from_asset(
+                os.path.join(os.path.dirname(__file__), "lambdas/download")
+            ),
+            environment={**common_env, "XML_URL_TTL": "300"},
+            layers=[common_layer],
+            timeout=Duration.seconds(10),
+        )
 
         # Permissões para as Lambdas acessarem os recursos necessários
         docs_bucket.grant_read_write(emit_fn)
         invoices.grant_read_write_data(emit_fn)
         invoices.grant_read_data(get_fn)
         invoices.grant_read_write_data(cancel_fn)
+        invoices.grant_read_data(xml_fn)
+        docs_bucket.grant_read(xml_fn)
         requests.grant_read_write_data(emit_fn)
 
         # Criação das filas SQS e Step Functions para processamento assíncrono
@@ -300,6 +358,9 @@ class RobustNfseStack(Stack):
         # Permite que a Lambda de emissão inicie a máquina de estados e exporta o ARN
         state_machine.grant_start_execution(emit_fn)
         emit_fn.add_environment("SFN_ARN", state_machine.state_machine_arn)
+        # Grava o XML comprimido (gzip) no S3; desligado por padrão. Ao ligar,
+        # downloads com Range passam a recortar os bytes comprimidos
+        emit_fn.add_environment("XML_GZIP", "false")
 
         # Criação da Lambda que processa mensagens da fila SQS
         processor_fn = _lambda.Function(
@@ -341,6 +402,8 @@ class RobustNfseStack(Stack):
             self,
             "NfseApi",
             rest_api_name="nfse-api",
+            # Permite que as Lambdas devolvam corpos comprimidos (gzip/br) em base64
+            binary_media_types=["*/*"],
             deploy_options=apigw.StageOptions(
                 stage_name="prod",
                 throttling_burst_limit=500,
@@ -392,6 +455,24 @@ class RobustNfseStack(Stack):
             authorization_type=apigw.AuthorizationType.COGNITO,
             api_key_required=True,
         )
+        # Download do XML via presigned URL (os bytes vão direto do S3 ao cliente)
+        invoice_xml_res = invoice_id_res.add_resource("xml")
+        invoice_xml_res.add_method(
+            "GET",
+            apigw.LambdaIntegration(xml_fn),
+            authorizer=authorizer,
+            authorization_type=apigw.AuthorizationType.COGNITO,
+            api_key_required=True,
+        )
+        # Assinatura em lote: POST /invoices/xml com {"ids": [...]}
+        xml_batch_res = invoices_res.add_resource("xml")
+        xml_batch_res.add_method(
+            "POST",
+            apigw.LambdaIntegration(xml_fn),
+            authorizer=authorizer,
+            authorization_type=apigw.AuthorizationType.COGNITO,
+            api_key_required=True,
+        )
         cancel_res = invoice_id_res.add_resource("cancel")
         cancel_res.add_method(
             "POST",
@@ -401,6 +482,14 @@ class RobustNfseStack(Stack):
             api_key_required=True,
         )
 
+        # Com binary_media_types "*/*", as integrações MOCK do preflight CORS
+        # (OPTIONS) respondem 500 se não converterem o corpo para texto
+        for child in api.node.find_all():
+            if isinstance(child, apigw.CfnMethod) and child.http_method == "OPTIONS":
+                child.add_property_override(
+                    "Integration.ContentHandling", "CONVERT_TO_TEXT"
+                )
+
         # Criação da chave de API e plano de uso
         api_key = apigw.ApiKey(self, "NfseApiKey")
         plan = apigw.UsagePlan(
@@ -0,0 +1,6 @@
+# Disponibiliza o pacote do Layer (lambdas/common/python) para os testes
+import os, sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "lambdas", "common", "python")
+)
@@ -0,0 +1,84 @@
+# Testes do montador de respostas HTTP (nfse_common.http)
+import base64, decimal, gzip, json
+
+import pytest
+
+from nfse_common import http
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    # Roda cada teste com os dois backends JSON (orjson só se estiver instalado)
+    if request.param == "orjson":
+        if http.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(http, "orjson", None)
+    return request.param
+
+
+def _event(accept_encoding):
+    return {"headers": {"Accept-Encoding": accept_encoding}}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip;q=0, *", None),
+        ("gzip; level=1; q=0", None),
+        ("gzip; Q = 0", None),
+        ("*;q=0", None),
+        ("identity", None),
+        ("deflate, *", "gzip"),
+        ("", None),
+    ],
+)
+def test_choose_encoding_honours_q_values(monkeypatch, header, expected):
+    monkeypatch.setattr(http, "brotli", None)
+    assert http.choose_encoding(_event(header)) == expected
+
+
+def test_choose_encoding_prefers_br_when_available(monkeypatch):
+    monkeypatch.setattr(http, "brotli", object())
+    assert http.choose_encoding(_event("gzip, br")) == "br"
+    assert http.choose_encoding(_event("gzip, br;q=0")) == "gzip"
+
+
+def test_dumps_keeps_decimal_exact(backend):
+    payload = {"total": decimal.Decimal("12345678901234567890.12")}
+    assert json.loads(http.dumps(payload)) == {"total": "12345678901234567890.12"}
+
+
+def test_dumps_accepts_non_str_keys(backend):
+    assert json.loads(http.dumps({1: 2})) == {"1": 2}
+
+
+def test_small_body_is_not_compressed(backend):
+    response = http.json_response(200, {"ok": True}, _event("gzip"))
+    assert response["body"] == '{"ok":true}'
+    assert "isBase64Encoded" not in response
+    assert response["headers"]["Access-Control-Allow-Origin"] == "*"
+
+
+def test_large_body_is_gzipped_in_base64(backend, monkeypatch):
+    monkeypatch.setattr(http, "brotli", None)
+    payload = {"items": ["é" * 100] * 50}
+    response = http.json_response(200, payload, _event("gzip"))
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert response["headers"]["Vary"] == "Accept-Encoding"
+    body = gzip.decompress(base64.b64decode(response["body"]))
+    assert json.loads(body) == payload
+
+
+def test_large_body_without_accept_encoding_stays_plain(backend):
+    payload = {"items": ["x" * 100] * 50}
+    response = http.json_response(200, payload, {"headers": {}})
+    assert json.loads(response["body"]) == payload
+    assert "Content-Encoding" not in response["headers"]
+
+
+def test_parse_json_body_decodes_base64():
+    event = {"body": base64.b64encode(b'{"a": 1}').decode(), "isBase64Encoded": True}
+    assert http.parse_json_body(event) == {"a": 1}
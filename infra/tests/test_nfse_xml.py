@@ -0,0 +1,87 @@
+# Testes do gerador de XML da NFS-e (nfse_common.nfse_xml)
+import gzip, hashlib
+from xml.dom import minidom
+
+import pytest
+
+from nfse_common import nfse_xml
+
+INVOICE_ID = "0f3a9c"
+CREATED_AT = "2025-03-10T12:00:00Z"
+PAYLOAD = {
+    "companyCnpj": "11.222.333/0001-81",
+    "total": "1530.75",
+    "issRate": "5",
+    "serviceCode": "01.07",
+    "description": "Suporte & manutenção <sistemas>",
+    "municipalityCode": "3550308",
+    "customer": {"document": "123.456.789-09", "name": 'Cliente "A"'},
+}
+
+
+def _text(dom, tag):
+    return dom.getElementsByTagName(tag)[0].firstChild.data
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("texto comum", "texto comum"),
+        ("a & b < c > d", "a &amp; b &lt; c &gt; d"),
+        ('"aspas"', "&quot;aspas&quot;"),
+        ("ab\x01c\x1f", "abc"),
+        ("x￾y", "xy"),
+        ("tab\tquebra\n", "tab\tquebra\n"),
+        (12, "12"),
+    ],
+)
+def test_escape(value, expected):
+    assert nfse_xml.escape(value) == expected
+
+
+def test_render_produces_well_formed_xml():
+    xml, _ = nfse_xml.render_nfse(INVOICE_ID, PAYLOAD, CREATED_AT)
+    dom = minidom.parseString(xml)
+    assert dom.documentElement.tagName == "GerarNfseEnvio"
+    assert _text(dom, "Discriminacao") == PAYLOAD["description"]
+    assert _text(dom, "RazaoSocial") == 'Cliente "A"'
+    assert _text(dom, "ValorServicos") == "1530.75"
+    assert _text(dom, "Aliquota") == "5.00"
+    assert _text(dom, "Cpf") == "12345678909"
+    assert _text(dom, "Cnpj") == "11222333000181"
+    assert _text(dom, "Competencia") == "2025-03-10"
+
+
+def test_invalid_chars_are_stripped_from_output():
+    payload = dict(PAYLOAD, description="linha\x01com\x0bcontrole")
+    xml, _ = nfse_xml.render_nfse(INVOICE_ID, payload, CREATED_AT)
+    assert _text(minidom.parseString(xml), "Discriminacao") == "linhacomcontrole"
+
+
+def test_alphanumeric_cnpj_is_kept():
+    payload = dict(PAYLOAD, companyCnpj="12.ABC.345/01DE-35")
+    xml, _ = nfse_xml.render_nfse(INVOICE_ID, payload, CREATED_AT)
+    assert _text(minidom.parseString(xml), "Cnpj") == "12ABC34501DE35"
+
+
+@pytest.mark.parametrize("field", nfse_xml.REQUIRED_FIELDS)
+def test_missing_required_field_raises(field):
+    payload = dict(PAYLOAD, **{field: ""})
+    with pytest.raises(ValueError, match=field):
+        nfse_xml.render_nfse(INVOICE_ID, payload, CREATED_AT)
+
+
+def test_hash_is_over_uncompressed_xml():
+    xml, digest = nfse_xml.render_nfse(INVOICE_ID, PAYLOAD, CREATED_AT)
+    packed, packed_digest = nfse_xml.render_nfse(
+        INVOICE_ID, PAYLOAD, CREATED_AT, compress=True
+    )
+    assert digest == packed_digest == hashlib.sha256(xml).hexdigest()
+    assert gzip.decompress(packed) == xml
+
+
+def test_unclosed_element_is_rejected():
+    w = nfse_xml.XmlWriter()
+    w.start("Rps")
+    with pytest.raises(ValueError):
+        w.getvalue()
@@ -0,0 +1,153 @@
+# Testes da validação de emissão (nfse_common.validation)
+import base64, json
+
+import pytest
+
+from nfse_common.validation import (
+    MAX_BODY_BYTES,
+    parse_invoice_request,
+    validate_invoice,
+)
+
+VALID = {
+    "companyCnpj": "11.222.333/0001-81",
+    "total": 100,
+    "municipalityCode": "3550308",
+    "serviceCode": "01.07",
+    "description": "Suporte técnico",
+}
+
+
+def _errors(**fields):
+    _, errors = validate_invoice(dict(VALID, **fields))
+    return errors
+
+
+def test_minimal_payload_is_valid():
+    clean, errors = validate_invoice(VALID)
+    assert errors == {}
+    assert clean["companyCnpj"] == "11222333000181"
+    assert str(clean["total"]) == "100"
+
+
+@pytest.mark.parametrize("cnpj", ["11222333000181", "12.ABC.345/01DE-35", "12abc34501de35"])
+def test_valid_cnpj(cnpj):
+    assert "companyCnpj" not in _errors(companyCnpj=cnpj)
+
+
+@pytest.mark.parametrize(
+    "cnpj, message",
+    [
+        ("11222333000182", "invalid CNPJ check digits"),
+        ("00000000000000", "invalid CNPJ check digits"),
+        ("12ABC34501DE36", "invalid CNPJ check digits"),
+        ("1122233300018", "must have 14 characters"),
+        (11222333000181, "must be a string"),
+    ],
+)
+def test_invalid_cnpj(cnpj, message):
+    assert _errors(companyCnpj=cnpj)["companyCnpj"] == message
+
+
+@pytest.mark.parametrize(
+    "document, message",
+    [
+        ("123.456.789-09", None),
+        ("12345678900", "invalid CPF check digits"),
+        ("11111111111", "invalid CPF check digits"),
+        ("11222333000181", None),
+    ],
+)
+def test_customer_document(document, message):
+    errors = _errors(customer={"document": document})
+    assert errors.get("customer.document") == message
+
+
+@pytest.mark.parametrize("total", [1e300, 10**40, "10000000000.00"])
+def test_total_out_of_range(total):
+    assert _errors(total=total)["total"].startswith("must be between")
+
+
+@pytest.mark.parametrize("total", [float("nan"), float("inf"), True, "1,00", "abc"])
+def test_total_not_a_number(total):
+    assert _errors(total=total)["total"] == "must be a number"
+
+
+def test_total_decimal_places():
+    assert _errors(total=10.005)["total"] == "must have at most 2 decimal places"
+
+
+@pytest.mark.parametrize("rate", [1e-7, "2.0125", 2.0125])
+def test_iss_rate_precision(rate):
+    assert _errors(issRate=rate)["issRate"] == "must have at most 2 decimal places"
+
+
+def test_iss_rate_accepted():
+    clean, errors = validate_invoice(dict(VALID, issRate="2.5"))
+    assert errors == {}
+    assert str(clean["issRate"]) == "2.5"
+
+
+@pytest.mark.parametrize(
+    "competence, message",
+    [
+        ("2025-02-28", None),
+        ("2025-02-31", "must be a valid calendar date"),
+        ("2025-13-01", "must be a valid calendar date"),
+        ("2025-2-1", "must be a date in YYYY-MM-DD format"),
+    ],
+)
+def test_competence(competence, message):
+    assert _errors(competence=competence).get("competence") == message
+
+
+def test_missing_required_fields():
+    _, errors = validate_invoice({})
+    assert set(errors) == {
+        "companyCnpj",
+        "total",
+        "municipalityCode",
+        "serviceCode",
+        "description",
+    }
+    assert set(errors.values()) == {"is required"}
+
+
+def test_deductions_must_not_exceed_total():
+    assert _errors(deductions="100.01")["deductions"] == "must not exceed total"
+
+
+def test_nested_errors_are_prefixed():
+    errors = _errors(customer={"email": 1, "address": {"state": "sp"}})
+    assert errors == {
+        "customer.email": "must be a string",
+        "customer.address.state": "has an invalid format",
+    }
+
+
+def test_body_must_be_an_object():
+    assert validate_invoice([]) == (None, {"body": "must be an object"})
+
+
+def test_request_with_base64_body():
+    body = base64.b64encode(json.dumps(VALID).encode()).decode()
+    _, errors = parse_invoice_request({"body": body, "isBase64Encoded": True})
+    assert errors == {}
+
+
+# Aninhamento profundo cabe no limite de tamanho, mas estoura a recursão do json
+@pytest.mark.parametrize(
+    "body", ["{", "[" * 30000 + "]" * 30000], ids=["truncated", "nested"]
+)
+def test_request_with_invalid_json(body):
+    assert parse_invoice_request({"body": body}) == (
+        None,
+        {"body": "must be valid JSON"},
+    )
+
+
+def test_request_size_counts_utf8_bytes():
+    body = json.dumps({"description": "é" * 40000}, ensure_ascii=False)
+    assert len(body) < MAX_BODY_BYTES
+    _, errors = parse_invoice_request({"body": body})
+    assert errors == {"body": f"must have at most {MAX_BODY_BYTES} bytes"}
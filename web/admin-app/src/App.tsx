@@ -48,8 +48,11 @@ export default function App() {
   const emit = async () => {
     try {
       const { data } = await api.post("/invoices", {
-        companyCnpj: "00000000000000",
+        companyCnpj: "11222333000181",
         total: 100,
+        municipalityCode: "3550308",
+        serviceCode: "01.07",
+        description: "Servicos de teste emitidos pela area administrativa",
       });
       setLog((l) => l + "\nEMIT: " + JSON.stringify(data));
     } catch (e: any) {